@@ -1,13 +1,37 @@
-import io
 import json
 import os
+import shutil
 import subprocess
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
-from flask import Flask, Response, jsonify, request, send_from_directory, render_template, send_file
-from PIL import Image, ImageOps
+import cv2
+import numpy as np
+from flask import Flask, Response, abort, request, send_from_directory, render_template, send_file
+from PIL import Image
+
+try:
+    import simplejpeg
+    HAS_SIMPLEJPEG = True
+except Exception:
+    HAS_SIMPLEJPEG = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+try:
+    from turbojpeg import TJPF_BGR, TurboJPEG
+    _tj = TurboJPEG()
+    HAS_TURBOJPEG = True
+except Exception:
+    HAS_TURBOJPEG = False
 
 app = Flask(__name__, static_folder="static", template_folder="templates")
 
@@ -16,28 +40,250 @@ TEMPLATES_PATH = Path(os.environ.get("PHOTOBOOTH_TEMPLATES_PATH", str(Path(__fil
 PHOTOS_DIR.mkdir(parents=True, exist_ok=True)
 
 BOUNDARY = "frame"
+A4_W, A4_H = 2480, 3508  # A4 at 300 DPI
 
+# Sepia as one gray -> BGR lookup: the same "#2e1f0f" -> "#f4e1c1" ramp as ImageOps.colorize
+# and the kiosk's SEPIA_LUT in main.py, in OpenCV's channel order
+SEPIA_LUT_BGR = np.stack([np.linspace(0x0f, 0xc1, 256),
+                          np.linspace(0x1f, 0xe1, 256),
+                          np.linspace(0x2e, 0xf4, 256)], axis=1).astype(np.uint8).reshape(256, 1, 3)
 
-def extract_jpegs(buffer: bytearray) -> List[bytes]:
-    frames: List[bytes] = []
-    i = 0
-    n = len(buffer)
-    while i + 1 < n:
-        if buffer[i] == 0xFF and buffer[i + 1] == 0xD8:  # SOI
-            j = i + 2
-            while j + 1 < n:
-                if buffer[j] == 0xFF and buffer[j + 1] == 0xD9:  # EOI
-                    j += 2
-                    frames.append(bytes(buffer[i:j]))
-                    i = j
-                    break
-                j += 1
-            else:
-                break
-        i += 1
-    if i > 0:
-        del buffer[:i]
-    return frames
+
+def json_loads(data: bytes):
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+def json_response(payload: dict, status: int = 200) -> Response:
+    body = orjson.dumps(payload) if HAS_ORJSON else json.dumps(payload)
+    return Response(body, status=status, mimetype="application/json")
+
+
+def request_json() -> dict:
+    try:
+        return json_loads(request.get_data()) or {}
+    except ValueError:
+        abort(400)
+
+
+def write_atomic(path: Path, data) -> None:
+    """Write data to a sibling temp file, fsync it, then rename it over path.
+
+    gunicorn runs several workers, so a follow-up /photo or /print request can be
+    served by another process: the rename means it sees either no file or the whole
+    JPEG, never a partial one. Errors propagate to the caller.
+    """
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)  # kiosks lose power; don't rename a file whose data isn't on disk yet
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+_DIR_CACHE: Dict[str, Path] = {}
+
+
+def _today_dir(base: Path) -> Path:
+    # The date directory only changes once a day; skip the mkdir/stat calls otherwise
+    key = time.strftime("%Y/%m/%d")
+    d = _DIR_CACHE.get(key)
+    if d is None:
+        d = base / key
+        d.mkdir(parents=True, exist_ok=True)
+        _DIR_CACHE.clear()
+        _DIR_CACHE[key] = d
+    return d
+
+
+def photo_url(path: Path) -> str:
+    return f"/photo/{path.relative_to(PHOTOS_DIR).as_posix()}"
+
+
+def extract_jpegs(buffer: bytearray) -> Tuple[List[Tuple[int, int]], int]:
+    """Return (start, end) spans of complete JPEGs in buffer and how many bytes were consumed."""
+    spans: List[Tuple[int, int]] = []
+    last_end = 0
+    # bytearray.find runs in C (memchr), so scanning stays out of the interpreter
+    i = buffer.find(b"\xff\xd8")  # SOI
+    while i != -1:
+        j = buffer.find(b"\xff\xd9", i + 2)  # EOI
+        if j == -1:
+            break
+        j += 2
+        spans.append((i, j))
+        last_end = j
+        i = buffer.find(b"\xff\xd8", j)
+    if i == -1:
+        # No partial frame pending; keep a trailing 0xFF in case SOI straddles reads
+        last_end = max(last_end, len(buffer) - 1)
+    else:
+        last_end = i
+    return spans, last_end
+
+
+def to_rect(r: dict) -> Tuple[int, int, int, int]:
+    x = int((r["leftPct"] / 100) * A4_W)
+    y = int((r["topPct"] / 100) * A4_H)
+    w = int((r["widthPct"] / 100) * A4_W)
+    h = int((r["heightPct"] / 100) * A4_H)
+    return x, y, w, h
+
+
+@lru_cache(maxsize=16)
+def _load_templates(path: str, mtime: float) -> Tuple[list, dict, dict]:
+    # mtime is part of the cache key so edits to the JSON are picked up
+    templates = json_loads(Path(path).read_bytes())
+    by_id = {t.get("id"): t for t in templates}
+    # Pixel rects only depend on the template, so compute them once per load
+    rects_by_id = {t.get("id"): [to_rect(r) for r in t.get("rects", [])] for t in templates}
+    return templates, by_id, rects_by_id
+
+
+# One entry per template background (two in public/templates/index.json); each A4 canvas is ~26 MB
+# per worker. A replaced file gets a new key (mtime) and its old entry ages out of the LRU.
+@lru_cache(maxsize=2)
+def _load_background(path: str, mtime: float, W: int, H: int) -> Optional[np.ndarray]:
+    canvas = cv2.imread(path, cv2.IMREAD_COLOR)
+    if canvas is None:
+        print(f"Failed to load background {path}")
+        return None
+    if canvas.shape[:2] != (H, W):
+        # Ensure it's the right size
+        canvas = cv2.resize(canvas, (W, H), interpolation=cv2.INTER_LANCZOS4)
+    # Shared between requests; callers take a copy before drawing on it
+    canvas.setflags(write=False)
+    return canvas
+
+
+def _sized_background_path(path: Path) -> Path:
+    return path.with_suffix(f".{A4_W}x{A4_H}.jpg")
+
+
+def _warm_backgrounds() -> None:
+    """Write A4-sized copies of template backgrounds so /compose never has to resize them."""
+    try:
+        templates, _, _ = _load_templates(str(TEMPLATES_PATH), TEMPLATES_PATH.stat().st_mtime)
+    except Exception as e:
+        print(f"Failed to read templates for background warmup: {e}")
+        return
+    for tpl in templates:
+        background_path = tpl.get("background")
+        if not background_path or not Path(background_path).exists():
+            continue
+        src = Path(background_path)
+        out = _sized_background_path(src)
+        if out.exists() and out.stat().st_mtime >= src.stat().st_mtime:
+            continue
+        img = cv2.imread(str(src), cv2.IMREAD_COLOR)
+        if img is None:
+            print(f"Failed to load background {src}")
+            continue
+        if img.shape[:2] != (A4_H, A4_W):
+            img = cv2.resize(img, (A4_W, A4_H), interpolation=cv2.INTER_LANCZOS4)
+        # Per-process temp name: each gunicorn worker may warm up concurrently
+        tmp = out.with_name(f"{out.stem}.{os.getpid()}.tmp.jpg")
+        try:
+            if cv2.imwrite(str(tmp), img, [cv2.IMWRITE_JPEG_QUALITY, 95]):
+                os.replace(tmp, out)
+        except Exception as e:
+            print(f"Failed to write sized background {out}: {e}")
+
+
+_warm_lock = threading.Lock()
+_backgrounds_warmed = False
+
+
+@app.before_request
+def _warm_backgrounds_once():
+    global _backgrounds_warmed
+    if _backgrounds_warmed:
+        return
+    with _warm_lock:
+        if not _backgrounds_warmed:
+            _warm_backgrounds()
+            _backgrounds_warmed = True
+
+
+def decode_image(p: str) -> Optional[np.ndarray]:
+    if HAS_TURBOJPEG:
+        try:
+            with open(p, "rb") as f:
+                return _tj.decode(f.read(), pixel_format=TJPF_BGR)
+        except Exception:
+            pass  # Not something libjpeg-turbo accepts (e.g. PNG); let OpenCV try
+    return cv2.imread(p, cv2.IMREAD_COLOR)
+
+
+def load_and_resize(canvas: np.ndarray, p: str, rect: Tuple[int, int, int, int]) -> bool:
+    img = decode_image(p)
+    if img is None:
+        return False
+    x, y, w, h = rect
+    ih, iw = img.shape[:2]
+    scale = min(w / iw, h / ih)  # Use min to fit inside rect (letterbox/pillarbox)
+    nw, nh = int(iw * scale), int(ih * scale)
+    if nw <= 0 or nh <= 0:
+        return True  # degenerate slot: nothing to draw
+    dx = x + (w - nw) // 2  # Center horizontally
+    dy = y + (h - nh) // 2  # Center vertically
+    H, W = canvas.shape[:2]
+    x0, y0 = max(dx, 0), max(dy, 0)
+    x1, y1 = min(dx + nw, W), min(dy + nh, H)
+    if x1 <= x0 or y1 <= y0:
+        return True  # slot lies entirely off the page
+    # INTER_AREA box-averages for heavy downscales; Lanczos is only worth it near 1:1
+    interp = cv2.INTER_AREA if scale < 0.5 else cv2.INTER_LANCZOS4
+    if (x0, y0, x1, y1) == (dx, dy, dx + nw, dy + nh):
+        # Slot lies fully on the canvas: resize straight into the canvas view, no separate paste
+        cv2.resize(img, (nw, nh), dst=canvas[dy:dy + nh, dx:dx + nw], interpolation=interp)
+    else:
+        # cv2.resize would silently reallocate a dst that is smaller than (nw, nh), so clip
+        # explicitly, the same way Image.paste does
+        resized = cv2.resize(img, (nw, nh), interpolation=interp)
+        canvas[y0:y1, x0:x1] = resized[y0 - dy:y1 - dy, x0 - dx:x1 - dx]
+    return True
+
+
+def is_passthrough(tpl: dict, selected_paths: List[str], filt: str) -> bool:
+    """True when composing would just reproduce the single selected JPEG at page size."""
+    rects = tpl.get("rects", [])
+    if filt != "none" or tpl.get("background") or len(selected_paths) != 1 or len(rects) != 1:
+        return False
+    r = rects[0]
+    if (r["leftPct"], r["topPct"], r["widthPct"], r["heightPct"]) != (0, 0, 100, 100):
+        return False
+    try:
+        # Image.open only parses the header here; no pixels are decoded
+        with Image.open(selected_paths[0]) as img:
+            if img.format != "JPEG":
+                return False
+            w, h = img.size
+    except Exception:
+        return False
+    return abs(w / h - A4_W / A4_H) < 0.01
+
+
+def _stop_process(proc: subprocess.Popen, timeout: float = 2.0) -> None:
+    """Terminate a child and reap it, so gunicorn workers don't collect zombie camera processes."""
+    try:
+        proc.terminate()
+        proc.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+    except Exception:
+        pass
 
 
 @app.get("/")
@@ -69,36 +315,118 @@ def stream():
             ],
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
+            bufsize=0,
         )
+        # Read the raw pipe directly, bypassing BufferedReader's extra copy and locking
+        fd = proc.stdout.fileno()
+        os.set_blocking(fd, True)
         buf = bytearray()
         try:
             while True:
-                chunk = proc.stdout.read(64 * 1024)
+                chunk = os.read(fd, 128 * 1024)
                 if not chunk:
                     break
                 buf.extend(chunk)
-                for frame in extract_jpegs(buf):
-                    part = (
-                        f"--{BOUNDARY}\r\n"
-                        f"Content-Type: image/jpeg\r\n"
-                        f"Content-Length: {len(frame)}\r\n\r\n"
-                    ).encode("ascii") + frame + b"\r\n"
-                    yield part
+                spans, consumed = extract_jpegs(buf)
+                view = memoryview(buf)
+                try:
+                    for start, end in spans:
+                        yield (
+                            f"--{BOUNDARY}\r\n"
+                            f"Content-Type: image/jpeg\r\n"
+                            f"Content-Length: {end - start}\r\n\r\n"
+                        ).encode("ascii")
+                        # Single copy straight out of the read buffer; WSGI writes need bytes
+                        yield bytes(view[start:end])
+                        yield b"\r\n"
+                finally:
+                    view.release()
+                if consumed > 0:
+                    del buf[:consumed]
         finally:
-            try:
-                proc.terminate()
-            except Exception:
-                pass
+            _stop_process(proc)
     return Response(generate(), mimetype=f"multipart/x-mixed-replace; boundary={BOUNDARY}")
 
 
+@app.get("/stream.mp4")
+def stream_mp4():
+    # H.264 comes from the Pi's hardware encoder; ffmpeg only remuxes it (no re-encode)
+    # into fragmented MP4 that a <video> element can play as it arrives.
+    def generate():
+        cam = subprocess.Popen(
+            [
+                "rpicam-vid",
+                "-n",
+                "--codec",
+                "h264",
+                "--inline",
+                "--width",
+                "960",
+                "--height",
+                "540",
+                "--framerate",
+                "30",
+                "-t",
+                "0",
+                "-o",
+                "-",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+        try:
+            mux = subprocess.Popen(
+                [
+                    "ffmpeg",
+                    "-loglevel",
+                    "error",
+                    "-fflags",
+                    "nobuffer",
+                    "-f",
+                    "h264",
+                    "-framerate",
+                    "30",
+                    "-i",
+                    "-",
+                    "-c:v",
+                    "copy",
+                    "-f",
+                    "mp4",
+                    "-movflags",
+                    "frag_keyframe+empty_moov+default_base_moof",
+                    "-",
+                ],
+                stdin=cam.stdout,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                bufsize=0,
+            )
+        except Exception:
+            # e.g. ffmpeg not installed: release the camera so the /stream fallback can open it
+            cam.stdout.close()
+            _stop_process(cam)
+            raise
+        cam.stdout.close()  # ffmpeg owns the read end now
+        fd = mux.stdout.fileno()
+        try:
+            while True:
+                chunk = os.read(fd, 128 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            for proc in (mux, cam):
+                _stop_process(proc)
+    return Response(generate(), mimetype="video/mp4")
+
+
 @app.post("/capture")
 def capture():
-    width = str(request.json.get("width", 1920))
-    height = str(request.json.get("height", 1080))
-    ts = datetime.utcnow().strftime("%Y/%m/%d/%H%M%S_%f")
-    out_path = PHOTOS_DIR / f"{ts}.jpg"
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+    data = request_json()
+    width = str(data.get("width", 1920))
+    height = str(data.get("height", 1080))
+    out_path = _today_dir(PHOTOS_DIR) / f"{time.time_ns()}.jpg"
     proc = subprocess.run(
         [
             "rpicam-still",
@@ -116,8 +444,8 @@ def capture():
         ]
     )
     if proc.returncode != 0:
-        return jsonify({"ok": False, "error": "rpicam-still failed"}), 500
-    return jsonify({"ok": True, "path": str(out_path), "url": f"/photo/{ts}.jpg"})
+        return json_response({"ok": False, "error": "rpicam-still failed"}, 500)
+    return json_response({"ok": True, "path": str(out_path), "url": photo_url(out_path)})
 
 
 @app.get("/photo/<path:rel>")
@@ -128,97 +456,93 @@ def get_photo(rel: str):
 
 @app.post("/compose")
 def compose():
-    data = request.get_json(force=True)
+    data = request_json()
     selected_paths: List[str] = data.get("selected_paths", [])
     filt = data.get("filter", "none")
     template_id = data.get("template_id", "single_full")
 
     try:
-        templates = json.loads(Path(TEMPLATES_PATH).read_text())
+        _, templates_by_id, rects_by_id = _load_templates(str(TEMPLATES_PATH), TEMPLATES_PATH.stat().st_mtime)
     except Exception as e:
-        return jsonify({"ok": False, "error": f"failed to read templates: {e}"}), 500
-    tpl = next((t for t in templates if t.get("id") == template_id), None)
+        return json_response({"ok": False, "error": f"failed to read templates: {e}"}, 500)
+    tpl = templates_by_id.get(template_id)
     if not tpl:
-        return jsonify({"ok": False, "error": f"template {template_id} not found"}), 400
+        return json_response({"ok": False, "error": f"template {template_id} not found"}, 400)
+
+    out_path = _today_dir(PHOTOS_DIR) / f"A4_{time.time_ns()}.jpg"
+
+    if is_passthrough(tpl, selected_paths, filt):
+        # Full-page photo, no background or filter: copy the file (sendfile on Linux)
+        try:
+            shutil.copyfile(selected_paths[0], out_path)
+        except OSError as e:
+            return json_response({"ok": False, "error": f"copy {selected_paths[0]}: {e}"}, 500)
+        return json_response({"ok": True, "path": str(out_path), "url": photo_url(out_path)})
 
-    W, H = 2480, 3508
+    W, H = A4_W, A4_H
     
-    # Load background template if available
+    # Load background template if available (canvas is a BGR ndarray, OpenCV's native layout)
+    canvas = None
     background_path = tpl.get("background")
     if background_path and Path(background_path).exists():
-        try:
-            canvas = Image.open(background_path).convert("RGB")
-            # Ensure it's the right size
-            if canvas.size != (W, H):
-                canvas = canvas.resize((W, H), Image.LANCZOS)
-        except Exception as e:
-            print(f"Failed to load background {background_path}: {e}")
-            canvas = Image.new("RGB", (W, H), (34, 34, 34))
-    else:
+        # Prefer the pre-sized copy written by _warm_backgrounds, unless the source was replaced since
+        src = Path(background_path)
+        sized = _sized_background_path(src)
+        if sized.exists() and sized.stat().st_mtime >= src.stat().st_mtime:
+            src = sized
+        background = _load_background(str(src), src.stat().st_mtime, W, H)
+        if background is not None:
+            canvas = background.copy()
+    if canvas is None:
         # Default solid color background
-        canvas = Image.new("RGB", (W, H), (34, 34, 34))
+        canvas = np.full((H, W, 3), 34, dtype=np.uint8)
 
-    def to_rect(r: dict) -> Tuple[int, int, int, int]:
-        x = int((r["leftPct"] / 100) * W)
-        y = int((r["topPct"] / 100) * H)
-        w = int((r["widthPct"] / 100) * W)
-        h = int((r["heightPct"] / 100) * H)
-        return x, y, w, h
+    rects = rects_by_id[template_id]
 
-    rects = [to_rect(r) for r in tpl.get("rects", [])]
+    selected_paths = selected_paths[:len(rects)]
+    if selected_paths:
+        # Decode and resize release the GIL, so slots are filled in parallel (rects don't overlap)
+        with ThreadPoolExecutor(max_workers=min(4, len(selected_paths))) as ex:
+            results = list(ex.map(partial(load_and_resize, canvas), selected_paths, rects))
+        for p, ok in zip(selected_paths, results):
+            if not ok:
+                return json_response({"ok": False, "error": f"open {p}: unreadable image"}, 500)
 
-    for i, p in enumerate(selected_paths):
-        if i >= len(rects):
-            break
-        try:
-            img = Image.open(p).convert("RGB")
-        except Exception as e:
-            return jsonify({"ok": False, "error": f"open {p}: {e}"}), 500
-        x, y, w, h = rects[i]
-        scale = min(w / img.width, h / img.height)  # Use min to fit inside rect (letterbox/pillarbox)
-        nw, nh = int(img.width * scale), int(img.height * scale)
-        resized = img.resize((nw, nh), Image.LANCZOS)
-        dx = x + (w - nw) // 2  # Center horizontally
-        dy = y + (h - nh) // 2  # Center vertically
-        canvas.paste(resized, (dx, dy))
-
-    if filt == "black_white":
-        canvas = ImageOps.grayscale(canvas).convert("RGB")
-    elif filt == "sepia":
-        g = ImageOps.colorize(ImageOps.grayscale(canvas), black="#2e1f0f", white="#f4e1c1")
-        canvas = g.convert("RGB")
-
-    ts = datetime.utcnow().strftime("%Y/%m/%d/%H%M%S_%f")
-    out_path = PHOTOS_DIR / f"A4_{ts}.jpg"
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    buf = io.BytesIO()
-    canvas.save(buf, format="JPEG", quality=95)
-    out_path.write_bytes(buf.getvalue())
-    return jsonify({"ok": True, "path": str(out_path), "url": f"/photo/A4_{ts}.jpg"})
+    if filt in ("black_white", "sepia"):
+        # uint8 SIMD kernels end to end: no float temporaries over the A4 canvas
+        canvas = cv2.cvtColor(cv2.cvtColor(canvas, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+        if filt == "sepia":
+            cv2.LUT(canvas, SEPIA_LUT_BGR, dst=canvas)
+
+    if HAS_SIMPLEJPEG:
+        # libjpeg-turbo directly, without the cv2/PIL wrapper overhead
+        jpg = simplejpeg.encode_jpeg(np.ascontiguousarray(canvas), quality=95, colorspace="BGR")
+    else:
+        ok, jpg = cv2.imencode(".jpg", canvas, [cv2.IMWRITE_JPEG_QUALITY, 95])
+        if not ok:
+            return json_response({"ok": False, "error": "jpeg encode failed"}, 500)
+    try:
+        write_atomic(out_path, jpg)
+    except OSError as e:
+        return json_response({"ok": False, "error": f"write {out_path}: {e}"}, 500)
+    return json_response({"ok": True, "path": str(out_path), "url": photo_url(out_path)})
 
 
 @app.post("/print")
 def do_print():
-    data = request.get_json(force=True)
+    data = request_json()
     path = data.get("path")
     printer = data.get("printer")
     if not path:
-        return jsonify({"ok": False, "error": "missing path"}), 400
+        return json_response({"ok": False, "error": "missing path"}, 400)
     args = ["lp", "-d", "Brother_DCP_T430W_USB", "-o", "media=Plain", "-o", "print-quality=4.5", path]
     proc = subprocess.run(args, capture_output=True)
     if proc.returncode != 0:
-        return jsonify({"ok": False, "error": proc.stderr.decode("utf-8", "ignore")}), 500
-    return jsonify({"ok": True})
+        return json_response({"ok": False, "error": proc.stderr.decode("utf-8", "ignore")}, 500)
+    return json_response({"ok": True})
 
 
 @app.get("/templates/index.json")
 def get_templates_index():
     return send_file(TEMPLATES_PATH)
 
-
-if __name__ == "__main__":
-    host = os.environ.get("HOST", "127.0.0.1")
-    port = int(os.environ.get("PORT", "8000"))
-    print(f"➡️  Starting server on http://{host}:{port}")
-    app.run(host=host, port=port, debug=True, threaded=True)
-
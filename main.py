@@ -1,22 +1,43 @@
 import os
-import io
 import json
 import time
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
+from functools import lru_cache, partial
+from importlib.util import find_spec
 from pathlib import Path
 from typing import List, Tuple, Optional
 
-from PIL import Image, ImageOps
+import numpy as np
+from PIL import Image
 
 import platform
 
+# cv2 and picamera2 each cost hundreds of ms to import on a Pi; only check they are installed here
+# and import them on first use (see _import_cv2 / _import_picamera)
+HAS_OPENCV = find_spec("cv2") is not None
+cv2 = None
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except Exception:
+    HAS_ORJSON = False
+
+try:
+    from turbojpeg import TJPF_BGR, TJPF_RGB, TJSAMP_420, TurboJPEG
+    _tj = TurboJPEG()
+    HAS_TURBOJPEG = True
+except Exception:
+    HAS_TURBOJPEG = False
+
 try:
-    import cv2
-    import numpy as np
-    HAS_OPENCV = True
+    from numba import njit, prange
+    HAS_NUMBA = True
 except Exception:
-    HAS_OPENCV = False
+    HAS_NUMBA = False
 
 
 
@@ -39,15 +60,10 @@ from kivy.uix.label import Label
 from kivy.uix.modalview import ModalView
 from kivy.uix.textinput import TextInput
 from kivy.uix.button import Button
-from kivy.graphics import Color, RoundedRectangle, Rectangle
+from kivy.graphics import Color, RoundedRectangle, Rectangle, Line, InstructionGroup, Fbo, BindTexture
 from kivy.animation import Animation
 
-try:
-    from picamera2 import Picamera2
-    from libcamera import Transform
-    HAS_PICAMERA = True
-except Exception:
-    HAS_PICAMERA = False
+HAS_PICAMERA = find_spec("picamera2") is not None
 
 try:
     from gpiozero import Button as GpioButton
@@ -56,22 +72,26 @@ except Exception:
     HAS_GPIO = False
 
 
-PHOTO_DIR = Path(os.environ.get("PHOTOBOOTH_PHOTOS_DIR", str(Path.home() / "photobooth/data/photos")))
+_photos_env = os.environ.get("PHOTOBOOTH_PHOTOS_DIR")
+PHOTO_DIR = Path(_photos_env) if _photos_env else Path.home() / "photobooth" / "data" / "photos"
 TEMPLATES_PATH = Path(os.environ.get("PHOTOBOOTH_TEMPLATES_PATH",
                                      str(Path(__file__).parent / "public/templates/index.json")))
 PHOTO_DIR.mkdir(parents=True, exist_ok=True)
+DEBUG = __debug__ and bool(os.environ.get("PHOTOBOOTH_DEBUG"))  # [DEBUG] trace output; failures always print
 
 A4_W, A4_H = 2480, 3508  # A4 at 300 DPI (standard print resolution)
-# Camera Module 3 resolutions:
-# - Still: 11.9MP (4608x2592) or 12MP (4056x3040)
-# - Video: 4K (3840x2160) or 1080p (1920x1080)
-CAMERA_STILL_W, CAMERA_STILL_H = 3840, 2160  # Max resolution for Camera Module 3
-CAMERA_VIDEO_W, CAMERA_VIDEO_H = 1920, 1080  # Use lower resolution for faster preview
+# Camera Module 3 streams: stills come from the 1920x1080 main stream (not the sensor's full
+# 4608x2592), which is plenty for a photo slot on an A4 print and avoids a mode switch per shot
+CAMERA_VIDEO_W, CAMERA_VIDEO_H = 1920, 1080  # Main stream: stills are captured at this size
+CAMERA_LORES_W, CAMERA_LORES_H = 1280, 720  # Lores stream: live preview
 PREVIEW_W, PREVIEW_H = 1080, 1920  # Preview display size (portrait)
 
 # Template display sizes (matching templates/index.html)
 TEMPLATE_DISPLAY_W = 2592  # Template display width
 TEMPLATE_DISPLAY_H = 1843  # Template display height
+PREVIEW_FPS = 60
+PREVIEW_IDLE_FPS = 15  # preview is only a backdrop behind the selection/review overlays
+CAPTURE_JPEG_QUALITY = 85  # intermediate shots are only previewed/selected; the A4 print keeps q95
 INACTIVITY_SECONDS = 90
 COUNTDOWN_SECONDS = 10
 
@@ -86,7 +106,86 @@ GPIO_ENTER = 27
 GPIO_PREV = 22
 GPIO_SHUTTER = 23
 
-FILTERS = ["none", "black_white", "sepia"]
+FILTERS = ("none", "black_white", "sepia")
+# Sepia as one gray -> RGB lookup (same ramp as ImageOps.colorize(gray, "#2e1f0f", "#f4e1c1"))
+SEPIA_LUT = np.stack([np.linspace(0x2e, 0xf4, 256),
+                      np.linspace(0x1f, 0xe1, 256),
+                      np.linspace(0x0f, 0xc1, 256)], axis=1).astype(np.uint8)
+GRAY_LUT = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+FILTER_LUTS = {"black_white": GRAY_LUT, "sepia": SEPIA_LUT}  # every non-"none" filter is luma -> LUT
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _luma_lut_into(src, dst, lut):
+        # Fused luma + gray->RGB lookup, rows split across cores; LLVM vectorizes the inner loop
+        for y in prange(src.shape[0]):
+            for x in range(src.shape[1]):
+                l = (src[y, x, 0] * 299 + src[y, x, 1] * 587 + src[y, x, 2] * 114) // 1000
+                dst[y, x, 0] = lut[l, 0]
+                dst[y, x, 1] = lut[l, 1]
+                dst[y, x, 2] = lut[l, 2]
+
+
+def _import_cv2() -> bool:
+    """Import OpenCV on first use; clears HAS_OPENCV if the installed module fails to load"""
+    global cv2, HAS_OPENCV
+    if cv2 is None and HAS_OPENCV:
+        try:
+            import cv2 as _cv2
+            cv2 = _cv2
+        except Exception:
+            HAS_OPENCV = False
+    return HAS_OPENCV
+
+
+def _import_picamera():
+    """Return (Picamera2, MappedArray, Transform), or None if picamera2/libcamera cannot be loaded"""
+    global HAS_PICAMERA
+    try:
+        from picamera2 import MappedArray, Picamera2
+        from libcamera import Transform
+    except Exception:
+        HAS_PICAMERA = False
+        return None
+    return Picamera2, MappedArray, Transform
+
+
+def json_loads(data: bytes):
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+@lru_cache(maxsize=1)
+def _read_templates() -> list:
+    """Parse the templates JSON once; call _read_templates.cache_clear() to pick up edits"""
+    return json_loads(TEMPLATES_PATH.read_bytes())
+
+
+def _copy_yuv420(dst: np.ndarray, src: np.ndarray, stride: int) -> None:
+    """Copy a mapped YUV420 buffer whose rows are `stride` bytes into a packed (H*3//2, W) array"""
+    flat = dst.reshape(-1)
+    w = dst.shape[1]
+    h = dst.shape[0] * 2 // 3
+    if stride == w:
+        flat[:] = src[:flat.size]
+        return
+    # Padded rows: Y is h rows of `stride`, then U and V are h/2 rows of stride/2 each
+    y_end = h * stride
+    c_rows, c_w, c_stride = h // 2, w // 2, stride // 2
+    c_size = c_rows * c_stride
+    flat[:h * w].reshape(h, w)[:] = src[:y_end].reshape(h, stride)[:, :w]
+    for i in range(2):
+        start = y_end + i * c_size
+        out = h * w + i * c_rows * c_w
+        flat[out:out + c_rows * c_w].reshape(c_rows, c_w)[:] = src[start:start + c_size].reshape(c_rows, c_stride)[:, :c_w]
+
+
+def _texture_from_array(arr: np.ndarray, colorfmt: str = "rgb") -> Texture:
+    """Upload an HxWx3 uint8 array to a new texture through a memoryview (no tobytes copy)"""
+    h, w = arr.shape[:2]
+    tex = Texture.create(size=(w, h), colorfmt=colorfmt)
+    tex.blit_buffer(memoryview(np.ascontiguousarray(arr)).cast("B"), colorfmt=colorfmt, bufferfmt="ubyte")
+    tex.flip_vertical()
+    return tex
 
 
 class ScreenState(str, Enum):
@@ -100,18 +199,75 @@ class ScreenState(str, Enum):
     PRINTING = "printing"
 
 
+# BT.601 YUV -> RGB on the GPU, same layout as Kivy's ffpyplayer video provider
+YUV_RGB_FS = """
+$HEADER$
+uniform sampler2D tex_y;
+uniform sampler2D tex_u;
+uniform sampler2D tex_v;
+
+void main(void) {
+    float y = texture2D(tex_y, tex_coord0).r;
+    float u = texture2D(tex_u, tex_coord0).r - 0.5;
+    float v = texture2D(tex_v, tex_coord0).r - 0.5;
+    float r = y + 1.402 * v;
+    float g = y - 0.344 * u - 0.714 * v;
+    float b = y + 1.772 * u;
+    gl_FragColor = vec4(r, g, b, 1.0);
+}
+"""
+
+
 class PreviewWidget(KivyImage):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.allow_stretch = True
         self.keep_ratio = True
+        self._tex_size = None
+        self._yuv_size = None
+
+    def show_yuv420(self, frame_yuv, size: Tuple[int, int]):
+        """Upload a planar YUV420 frame (Picamera2 layout) and convert it in a fragment shader"""
+        w, h = size
+        if self._yuv_size != (w, h):
+            self._tex_y = Texture.create(size=(w, h), colorfmt="luminance", bufferfmt="ubyte", mipmap=False)
+            self._tex_u = Texture.create(size=(w // 2, h // 2), colorfmt="luminance", bufferfmt="ubyte", mipmap=False)
+            self._tex_v = Texture.create(size=(w // 2, h // 2), colorfmt="luminance", bufferfmt="ubyte", mipmap=False)
+            self._fbo = fbo = Fbo(size=(w, h))
+            with fbo:
+                BindTexture(texture=self._tex_u, index=1)
+                BindTexture(texture=self._tex_v, index=2)
+                Rectangle(size=fbo.size, texture=self._tex_y)
+            fbo.shader.fs = YUV_RGB_FS
+            fbo["tex_y"] = 0
+            fbo["tex_u"] = 1
+            fbo["tex_v"] = 2
+            self.texture = fbo.texture
+            self.texture.flip_vertical()
+            self._yuv_size = (w, h)
+            self._tex_size = None
+        buf = memoryview(frame_yuv).cast("B")
+        y_len, c_len = w * h, (w // 2) * (h // 2)
+        self._tex_y.blit_buffer(buf[:y_len], colorfmt="luminance", bufferfmt="ubyte")
+        self._tex_u.blit_buffer(buf[y_len:y_len + c_len], colorfmt="luminance", bufferfmt="ubyte")
+        self._tex_v.blit_buffer(buf[y_len + c_len:y_len + 2 * c_len], colorfmt="luminance", bufferfmt="ubyte")
+        self._fbo.ask_update()
+        self._fbo.draw()
+        self.canvas.ask_update()
 
-    def show_frame(self, frame_rgb):
-        h, w, _ = frame_rgb.shape
-        if not self.texture or self.texture.size != (w, h):
-            self.texture = Texture.create(size=(w, h), colorfmt="rgb")
+    def show_frame(self, frame, colorfmt: str = "rgb"):
+        """Upload an HxWx3 frame; pass colorfmt="bgr" to let GL swizzle instead of converting on the CPU"""
+        h, w, _ = frame.shape
+        if self._tex_size != (w, h, colorfmt):
+            # Streaming textures: never mipmapped, so a blit is one glTexSubImage2D with no chain regen
+            self.texture = Texture.create(size=(w, h), colorfmt=colorfmt, bufferfmt="ubyte", mipmap=False)
             self.texture.flip_vertical()
-        self.texture.blit_buffer(frame_rgb.tobytes(), colorfmt="rgb", bufferfmt="ubyte")
+            self._tex_size = (w, h, colorfmt)
+            self._yuv_size = None
+        if not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+        # blit_buffer takes any buffer-protocol object: upload straight from the ndarray, no tobytes() copy
+        self.texture.blit_buffer(memoryview(frame).cast("B"), colorfmt=colorfmt, bufferfmt="ubyte")
         self.canvas.ask_update()
 
 
@@ -151,6 +307,7 @@ class PhotoboothRoot(FloatLayout):
             valign='top'
         )
         self.hud.bind(texture_size=self.hud.setter('size'))
+        self._hud_args = None
         self.add_widget(self.hud)
         self._decorate_panel(self.hud)
 
@@ -178,6 +335,7 @@ class PhotoboothRoot(FloatLayout):
         )
         self.countdown.opacity = 0
         self.add_widget(self.countdown)
+        self._countdown_anim = Animation(font_size=140, d=0.25, t='out_quad')
 
         # Center image overlay (quick review or composed image)
         self.quick = KivyImage(
@@ -230,23 +388,28 @@ class PhotoboothRoot(FloatLayout):
         )
         self.selection_box.opacity = 0
         self.add_widget(self.selection_box)
+        self._thumb_widgets: List[KivyImage] = []
+        self._thumbs_attached = 0
         self._decorate_panel(self.selection_box, pad=(12, 12), radius=14)
 
     def update_hud(self, state: ScreenState, filter_name: str, template_name: str, remaining: int):
-        self.hud_text = f"State: {state} • Filter: {filter_name} • Template: {template_name} • Remaining: {max(remaining,0)}"
-        self.hud.text = self.hud_text
+        # Only re-format on change, and only touch the Label (which re-rasterizes) when its text differs;
+        # the selection screen writes its own hint into the same label
+        args = (state, filter_name, template_name, max(remaining, 0))
+        if args != self._hud_args:
+            self._hud_args = args
+            self.hud_text = f"State: {state} • Filter: {filter_name} • Template: {template_name} • Remaining: {args[3]}"
+        if self.hud.text != self.hud_text:
+            self.hud.text = self.hud_text
 
     def show_countdown(self, n: int):
         self.countdown_value = n
         self.countdown.text = str(n)
         self.countdown.opacity = 1
-        # pop animation each tick - back to landscape
-        try:
-            Animation.cancel_all(self.countdown)
-        except Exception:
-            pass
+        # pop animation each tick - back to landscape; one Animation object is restarted every tick
+        self._countdown_anim.stop(self.countdown)
         self.countdown.font_size = 180  # Back to normal max size
-        Animation(font_size=140, d=0.25, t='out_quad').start(self.countdown)
+        self._countdown_anim.start(self.countdown)
 
     def hide_countdown(self):
         self.countdown.opacity = 0
@@ -262,7 +425,9 @@ class PhotoboothRoot(FloatLayout):
 
     # Overlay helpers
     def set_status(self, camera_label: str, printer_label: str):
-        self.status.text = f"Camera: {camera_label}    Printer: {printer_label}    Settings (O)"
+        text = f"Camera: {camera_label}    Printer: {printer_label}    Settings (O)"
+        if self.status.text != text:
+            self.status.text = text
 
     def set_overlay(self, title: str = "", subtitle: str = "", footer: str = "", visible: bool = True):
         self.title.text = title
@@ -273,42 +438,57 @@ class PhotoboothRoot(FloatLayout):
         self.footer.opacity = 1 if visible and footer else 0
 
     def show_selection(self, thumbs: List[Texture], cursor_index: int, selected_indices: List[int]):
-        # Rebuild thumbnails each time for simplicity
-        from kivy.uix.image import Image as KImg
-        self.selection_box.clear_widgets()
-        for i, tex in enumerate(thumbs):
-            w = KImg(texture=tex, allow_stretch=True, keep_ratio=True)
+        # Thumbnail widgets are pooled: the box is only repopulated when the count changes,
+        # cursor moves just update texture/size/color on the existing widgets
+        while len(self._thumb_widgets) < len(thumbs):
+            self._thumb_widgets.append(KivyImage(allow_stretch=True, keep_ratio=True))
+        shown = self._thumb_widgets[:len(thumbs)]
+        if self._thumbs_attached != len(shown):
+            self.selection_box.clear_widgets()
+            for w in shown:
+                self.selection_box.add_widget(w)
+            self._thumbs_attached = len(shown)
+        for w, tex in zip(shown, thumbs):
+            w.texture = tex
+        self.update_selection_highlight(cursor_index, selected_indices)
+        self.selection_box.opacity = 1
+
+    def update_selection_highlight(self, cursor_index: int, selected_indices: List[int]):
+        """Restyle the shown thumbnails for a cursor/selection change; their textures are left alone"""
+        for i, w in enumerate(self._thumb_widgets[:self._thumbs_attached]):
             # Emphasize cursor by scaling - back to horizontal layout
             w.size_hint = (0.28, 1.0) if i == cursor_index else (0.24, 1.0)  # Back to horizontal
             # Dim unselected when selection made
-            if selected_indices and (i not in selected_indices):
-                w.color = (1, 1, 1, 0.7)
-            self.selection_box.add_widget(w)
-        self.selection_box.opacity = 1
+            w.color = (1, 1, 1, 0.7) if selected_indices and (i not in selected_indices) else (1, 1, 1, 1)
 
     def hide_selection(self):
         self.selection_box.opacity = 0
 
     # Styling helpers
     def _decorate_panel(self, widget, pad=(10, 8), radius=RADIUS, bg_rgba=PANEL_BG, border_rgba=PANEL_BORDER):
-        # Draw rounded translucent panel behind widget and keep it synced
-        with widget.canvas.before:
-            Color(*bg_rgba)
-            widget._bg = RoundedRectangle(radius=[radius], pos=(widget.x - pad[0], widget.y - pad[1]), size=(widget.width + pad[0]*2, widget.height + pad[1]*2))
-            Color(*border_rgba)
-            widget._border = RoundedRectangle(radius=[radius], pos=(widget.x - pad[0], widget.y - pad[1]), size=(widget.width + pad[0]*2, widget.height + pad[1]*2))
-
-        def _sync(*_):
-            x = widget.x - pad[0]
-            y = widget.y - pad[1]
-            w = widget.width + pad[0]*2
-            h = widget.height + pad[1]*2
-            widget._bg.pos = (x, y)
-            widget._bg.size = (w, h)
-            widget._border.pos = (x, y)
-            widget._border.size = (w, h)
-
-        widget.bind(pos=_sync, size=_sync)
+        # Draw rounded translucent panel behind widget and keep it synced:
+        # one fill + one outline in a single instruction group
+        group = InstructionGroup()
+        group.add(Color(*bg_rgba))
+        widget._bg = RoundedRectangle(radius=[radius])
+        group.add(widget._bg)
+        group.add(Color(*border_rgba))
+        widget._border = Line(width=1)
+        group.add(widget._border)
+        widget.canvas.before.add(group)
+
+        sync = partial(self._sync_panel, widget, pad, radius)
+        sync()
+        # pos_hint layouts move widgets without resizing them, so pos still needs its own binding
+        widget.bind(pos=sync, size=sync)
+
+    @staticmethod
+    def _sync_panel(widget, pad, radius, *_):
+        x, y = widget.x - pad[0], widget.y - pad[1]
+        w, h = widget.width + pad[0] * 2, widget.height + pad[1] * 2
+        widget._bg.pos = (x, y)
+        widget._bg.size = (w, h)
+        widget._border.rounded_rectangle = (x, y, w, h, radius)
 
 
 class PhotoboothApp(App):
@@ -327,10 +507,12 @@ class PhotoboothApp(App):
                 pass
 
         self.state: ScreenState = ScreenState.ATTRACT
-        self.last_input_ts = time.time()
+        self.last_input_ts = time.monotonic()  # monotonic: NTP jumps must not trigger/skip the timeout
+        self._session_dir = PHOTO_DIR
         self.templates = self._load_templates()
         self.template_index = 0
         self.current_template = self.templates[self.template_index]
+        self._slots = self.current_template["slots"]  # hot in input/state handling; refreshed with the template
         
         # Current display size (changes based on template)
         self.current_display_w, self.current_display_h = self._get_template_display_size(self.current_template)
@@ -339,28 +521,52 @@ class PhotoboothApp(App):
 
         self.to_take = 0
         self.taken_count = 0
+        self.count_ev = None  # countdown interval while one is running
         self.captures: List[Path] = []
+        self.capture_thumbs: List[Optional[Texture]] = []  # parallel to captures
         self.selected_indices: List[int] = []
         self.selection_cursor = 0
         self.last_composed_path: Optional[Path] = None
+        # Composition runs off the UI thread so the preview keeps updating (PIL releases the GIL)
+        self._pool = ThreadPoolExecutor(max_workers=1)
+        self._compose_future = None
+        self._compose_cache: dict = {}  # (template id, selected paths) -> unfiltered A4 canvas
+        self._print_proc: Optional[subprocess.Popen] = None
+        self._canvas_arr = np.full((A4_H, A4_W, 3), 34, dtype=np.uint8)
+        if HAS_NUMBA and not HAS_OPENCV:
+            # Only the no-OpenCV fallback runs the kernel. Compile it now rather than on the first
+            # filter change, with the same array types _apply_filter passes (writable C-contiguous
+            # uint8: the base is self._canvas_arr) so numba doesn't specialize again later.
+            _luma_lut_into(np.zeros((4, 4, 3), np.uint8), np.empty((4, 4, 3), np.uint8), SEPIA_LUT)
 
         self.printer_name = ""
+        self._printer_mtime: Optional[float] = None
         self._load_printer_name()
 
         # Initialize camera (Picamera2 on Pi, OpenCV on Mac)
-        print("[DEBUG] Initializing camera...")
+        if DEBUG:
+            print("[DEBUG] Initializing camera...")
         self._init_camera()
+        self._frame_count = 0
+        self._cam_lock = threading.Lock()  # serializes preview reads with shutter captures
+        self._frame_lock = threading.Lock()
+        self._latest_frame = None  # (is_bgr, frame) from _capture_loop, consumed by _update_preview
+        self._stop_capture = threading.Event()
+        self._capture_thread = threading.Thread(target=self._capture_loop, name="camera-preview", daemon=True)
+        self._capture_thread.start()
 
         self.root_widget = PhotoboothRoot()
         self._update_hud()
         # Initial status + attract overlay
         cam_label = "Pi Camera" if HAS_PICAMERA else ("FaceTime HD Camera" if not HAS_PICAMERA else "Camera")
         self.root_widget.set_status(cam_label, self.printer_name or "-")
-        print(f"[DEBUG] Camera initialized: {cam_label}")
-        print(f"[DEBUG] Printer configured: {self.printer_name or 'None'}")
+        if DEBUG:
+            print(f"[DEBUG] Camera initialized: {cam_label}")
+            print(f"[DEBUG] Printer configured: {self.printer_name or 'None'}")
         self._show_attract()
 
-        Clock.schedule_interval(self._update_preview, 1 / 60.0)  # 60 FPS
+        self._last_preview_ts = 0.0
+        Clock.schedule_interval(self._update_preview, 1 / PREVIEW_FPS)
         Clock.schedule_interval(self._check_inactivity, 1.0)
         # Clock.schedule_interval(self._check_gpio_status, 5.0)  # Comment out GPIO status check
 
@@ -392,7 +598,7 @@ class PhotoboothApp(App):
 
     def _load_templates(self):
         try:
-            tpls = json.loads(TEMPLATES_PATH.read_text())
+            tpls = _read_templates()
         except Exception:
             tpls = [{"id": "single_full", "name": "Single Full", "slots": 1,
                      "rects": [{"leftPct": 10, "topPct": 15, "widthPct": 80, "heightPct": 70}]}]
@@ -411,25 +617,39 @@ class PhotoboothApp(App):
                      {"leftPct": 20, "topPct": 64, "widthPct": 60, "heightPct": 28}
                  ]}
             ]
+        # Resolve slot geometry to A4 pixels once instead of on every compose/filter cycle
+        sx, sy = A4_W / 100.0, A4_H / 100.0
+        for tpl in tpls:
+            tpl["_rects_px"] = [(int(r["leftPct"] * sx), int(r["topPct"] * sy),
+                                 int(r["widthPct"] * sx), int(r["heightPct"] * sy))
+                                for r in tpl.get("rects", [])]
         return tpls
 
     def _init_camera(self):
         """Initialize camera - Picamera2 on Pi, OpenCV on Mac"""
-        if HAS_PICAMERA:
+        self._flip_buf: Optional[np.ndarray] = None  # reused mirror buffer for the OpenCV preview
+        self._bgr_bufs = [np.empty((720, 1280, 3), np.uint8) for _ in range(2)]  # OpenCV read targets
+        self._bgr_next = 0
+        backend = _import_picamera() if HAS_PICAMERA else None
+        if backend:
+            Picamera2, self._MappedArray, Transform = backend
             self.use_opencv = False
+            # Lores YUV420 copy targets (Y plane + quarter-size U and V), reused every frame
+            self._yuv_bufs = [np.empty((CAMERA_LORES_H * 3 // 2, CAMERA_LORES_W), np.uint8) for _ in range(2)]
+            self._yuv_next = 0
             self.picam = Picamera2()
             
-            # Create configurations with proper buffer management - Camera Module 3 optimized with rotation
-            # Use smaller resolution for preview to increase frame rate
-            self.video_config = self.picam.create_preview_configuration(
-                main={"size": (CAMERA_VIDEO_W, CAMERA_VIDEO_H), "format": "RGB888"},  # Use lower resolution for faster preview
-                transform=Transform(hflip=1, vflip=0, rotation=0),  # No rotation - we'll handle it in software
-                buffer_count=8,  # Increase buffer count for smoother preview
-            )
-            self.still_config = self.picam.create_still_configuration(
-                main={"size": (CAMERA_STILL_W, CAMERA_STILL_H), "format": "RGB888"},  # 4056x3040 for Camera Module 3
+            # One video configuration serves both preview (lores) and stills (main), so a shutter
+            # press never has to tear down and rebuild the pipeline with switch_mode
+            self.video_config = self.picam.create_video_configuration(
+                main={"size": (CAMERA_VIDEO_W, CAMERA_VIDEO_H), "format": "RGB888"},
+                # YUV420 is ~half the bytes of RGB888; PreviewWidget converts it to RGB on the GPU
+                lores={"size": (CAMERA_LORES_W, CAMERA_LORES_H), "format": "YUV420"},
+                display="lores",
                 transform=Transform(hflip=1, vflip=0, rotation=0),  # No rotation - we'll handle it in software
-                buffer_count=2,  # Add explicit buffer count
+                # Two buffers: one being filled while we copy the other. Deeper queues only add latency
+                # (and ~6 MB of CMA per 1080p RGB888 buffer); one would stall the ISP during each copy
+                buffer_count=2,
             )
             
             # Add some camera tuning for better stability
@@ -437,14 +657,17 @@ class PhotoboothApp(App):
             
             try:
                 self.picam.configure(self.video_config)
+                # libcamera may pad lores rows; _copy_yuv420 drops the padding when it does
+                self._lores_stride = self.picam.stream_configuration("lores")["stride"]
                 self.picam.start()
                 print("✓ Using Picamera2 (Raspberry Pi)")
             except Exception as e:
                 print(f"Warning: Picamera2 initialization failed: {e}")
                 raise RuntimeError("Picamera2 initialization failed")
-        elif HAS_OPENCV:
+        elif _import_cv2():
             self.use_opencv = True
             self.cap = cv2.VideoCapture(0)
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # always read the newest frame, not a queued one
             self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
             self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
             print("✓ Using OpenCV (MacBook camera)")
@@ -452,132 +675,187 @@ class PhotoboothApp(App):
             raise RuntimeError("No camera backend available. Install picamera2 (Pi) or opencv-python (Mac)")
 
     def _update_preview(self, *_):
-        try:
-            if self.use_opencv:
-                ret, frame = self.cap.read()
-                if ret:
-                    # Convert BGR to RGB and flip horizontally for mirror effect
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    frame = cv2.flip(frame, 1)
-                    self.root_widget.preview.show_frame(frame)
-            else:
-                # Use try-catch for Picamera2 to handle buffer errors gracefully
-                try:
-                    # Initialize frame counter if not exists
-                    if not hasattr(self, '_frame_count'):
-                        self._frame_count = 0
-                    self._frame_count += 1
-                    
-                    # Step 1: Capture full resolution image
-                    if self._frame_count == 1:
-                        print(f"[DEBUG] Step 1: Capturing frame from camera...")
-                    full_frame = self.picam.capture_array("main")
-                    print(f"[DEBUG] Capture completed, frame is {'None' if full_frame is None else 'valid'}")
-                    if full_frame is None or full_frame.size == 0:
-                        print("[DEBUG] Invalid frame received")
-                        return
-                    
-                    # Step 2: Debug frame info
-                    
-                    if self._frame_count == 1 or self._frame_count % 100 == 0:  # Print less frequently
-                        print(f"[DEBUG] Step 2: Full frame shape: {full_frame.shape}, dtype: {full_frame.dtype}")
-                        print(f"[DEBUG] Step 2: Min: {full_frame.min()}, Max: {full_frame.max()}, Size: {full_frame.size}")
-                    
-
-                    # Calculate A4 portrait crop area (center crop)
-                    # crop_w = 1833  # Crop 60% of width
-                    # crop_h = 2592  # Crop 80% of height
-                    # start_x = 1388
-                    # start_y = 0
-                    
-                    # # Crop the center area
-                    # cropped_frame = full_frame[start_y:start_y+crop_h, start_x:start_x+crop_w]
-                    
-                    # # Resize to display size (1080x1920 for portrait)
-                    # display_frame = cv2.resize(cropped_frame, (1833, 2592))
-                    
-                    # # Rotate 90 degrees for portrait display
-                    # rotated_frame = cv2.rotate(display_frame, cv2.ROTATE_90_CLOCKWISE)
-                    
-                    # # Fix color channel swapping for preview only (RGB to BGR)
-                    # rotated_frame = rotated_frame[:, :, ::-1]  # Reverse RGB to BGR for display
-                    
-                    # Step 3: Rotate frame first
-                    # if self._frame_count == 1:
-                    #     print(f"[DEBUG] Step 3: Rotating frame 90 degrees...")
-                    # # rotated_frame = cv2.rotate(full_frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
-                    
-                    # if self._frame_count == 1:
-                    #     print(f"[DEBUG] Step 3: Rotated shape: {rotated_frame.shape}")
-
-                    # # Step 4: Crop center area (100% width, 40% height) - no resize
-                    # if self._frame_count == 1:
-                    #     print(f"[DEBUG] Step 4: Cropping center area...")
-                    # h, w = rotated_frame.shape[:2]
-                    # crop_w = int(w)  # Crop 100% of width
-                    # crop_h = int(h * 0.4)  # Crop 40% of height
-                    # start_x = (w - crop_w) // 2
-                    # start_y = (h - crop_h) // 2
-                    
-                    # cropped_frame = rotated_frame[start_y:start_y+crop_h, start_x:start_x+crop_w]
-                    
-                    
-                    # if self._frame_count == 1:
-                    #     print(f"[DEBUG] Step 4: Cropped shape: {cropped_frame.shape}")
-
-                    # # Step 5: No resize - use cropped frame directly
-                    # if self._frame_count == 1:
-                    #     print(f"[DEBUG] Step 5: No resize - using cropped frame directly")
-                    preview_frame = full_frame
-                    
-                    if self._frame_count == 1:
-                        print(f"[DEBUG] Step 5: Preview shape: {preview_frame.shape}, dtype: {preview_frame.dtype}")
-                        print(f"[DEBUG] Step 5: Preview min: {preview_frame.min()}, max: {preview_frame.max()}")
-                    
-                    # Step 6: Fix color channel swapping for preview (RGB to BGR)
-                    if self._frame_count == 1:
-                        print(f"[DEBUG] Step 6: Converting RGB to BGR for display...")
-                    preview_frame = preview_frame[:, :, ::-1]  # Reverse RGB to BGR for display
-                    
-                    # Step 7: Display frame
-                    if self._frame_count == 1:
+        # Leave the camera and memory bus to the capture/print work while it runs
+        if self.state in (ScreenState.CAPTURING, ScreenState.PRINTING):
+            return
+        # Drop ticks that Clock delivers back-to-back after a stall, and upload at a lower rate
+        # while the guest is looking at thumbnails or the composed page rather than the camera
+        fps = PREVIEW_IDLE_FPS if self.state in (ScreenState.SELECTION, ScreenState.REVIEW) else PREVIEW_FPS
+        now = time.monotonic()
+        if now - self._last_preview_ts < 0.75 / fps:
+            return
+        self._last_preview_ts = now
+        # Frames arrive from _capture_loop; the UI thread only uploads the newest one.
+        # Everything below runs under the lock because _capture_loop recycles its read buffers.
+        with self._frame_lock:
+            item, self._latest_frame = self._latest_frame, None
+            if item is None:
+                return
+            is_bgr, frame = item
+            try:
+                if is_bgr:
+                    # Flip horizontally for mirror effect; the texture takes BGR as-is, so no cvtColor pass
+                    if self._flip_buf is None or self._flip_buf.shape != frame.shape:
+                        self._flip_buf = np.empty_like(frame)
+                    cv2.flip(frame, 1, dst=self._flip_buf)
+                    self.root_widget.preview.show_frame(self._flip_buf, colorfmt="bgr")
+                else:
+                    # Step 7: Display frame (YUV420 planes, converted to RGB by the preview shader)
+                    if DEBUG and self._frame_count == 1:
                         print(f"[DEBUG] Step 7: Sending frame to preview widget...")
-                    self.root_widget.preview.show_frame(preview_frame)
-                    
-                    if self._frame_count == 1:
+                    self.root_widget.preview.show_yuv420(frame, (CAMERA_LORES_W, CAMERA_LORES_H))
+
+                    if DEBUG and self._frame_count == 1:
                         print(f"[DEBUG] Step 7: Frame sent successfully!")
-                except Exception as e:
-                    # Show the error that occurred
-                    print(f"[DEBUG] Picamera2 error: {e}")
-                    # If capture fails, try to restart the camera
-                    if "Failed to queue buffer" in str(e) or "Input/output error" in str(e):
-                        try:
-                            print("Camera buffer error detected, attempting restart...")
-                            self.picam.stop()
-                            time.sleep(0.1)  # Brief pause
-                            self.picam.start()
-                        except Exception as restart_e:
-                            print(f"Camera restart failed: {restart_e}")
-                            # Switch to OpenCV fallback if available
-                            if HAS_OPENCV and not self.use_opencv:
-                                print("Switching to OpenCV fallback...")
-                                self.use_opencv = True
-                                self.cap = cv2.VideoCapture(0)
-                                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-                                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            except Exception as e:
+                # Show any preview errors for debugging
+                print(f"[DEBUG] Preview error: {e}")
+                if DEBUG:  # a persistent fault would otherwise dump a traceback every frame
+                    import traceback
+                    traceback.print_exc()
+
+    def _capture_loop(self):
+        """Read camera frames off the Kivy thread so a stalled capture never freezes the UI"""
+        while not self._stop_capture.is_set():
+            if self.state in (ScreenState.CAPTURING, ScreenState.PRINTING):
+                time.sleep(0.05)
+                continue
+            item = None
+            try:
+                with self._cam_lock:
+                    if self.use_opencv:
+                        # Read into alternating preallocated buffers instead of a fresh array per frame
+                        ret, frame = self.cap.read(self._bgr_bufs[self._bgr_next])
+                        if ret:
+                            self._bgr_bufs[self._bgr_next] = frame  # same array unless the size changed
+                            self._bgr_next ^= 1
+                            item = (True, frame)
+                    else:
+                        frame = self._read_picam_frame()
+                        if frame is not None:
+                            item = (False, frame)
+            except Exception as e:
+                print(f"[DEBUG] Preview error: {e}")
+            if item is None:
+                time.sleep(0.05)
+                continue
+            # Single slot: an unshown older frame is simply replaced
+            with self._frame_lock:
+                self._latest_frame = item
+
+    def _read_picam_frame(self) -> Optional[np.ndarray]:
+        # Use try-catch for Picamera2 to handle buffer errors gracefully
+        try:
+            self._frame_count += 1
+            
+            # Step 1: Capture full resolution image
+            if DEBUG and self._frame_count == 1:
+                print(f"[DEBUG] Step 1: Capturing frame from camera...")
+            req = self.picam.capture_request()
+            try:
+                # Copy straight out of the mapped lores buffer into a recycled array instead of
+                # letting capture_array allocate one per frame
+                full_frame = self._yuv_bufs[self._yuv_next]
+                with self._MappedArray(req, "lores", reshape=False) as m:
+                    with self._frame_lock:  # _update_preview uploads these buffers under the same lock
+                        _copy_yuv420(full_frame, m.array.reshape(-1), self._lores_stride)
+                self._yuv_next ^= 1
+            finally:
+                req.release()
+            if DEBUG and self._frame_count == 1:
+                print(f"[DEBUG] Capture completed, frame is {'None' if full_frame is None else 'valid'}")
+            if full_frame is None or full_frame.size == 0:
+                if DEBUG:
+                    print("[DEBUG] Invalid frame received")
+                return None
+            
+            # Step 2: Debug frame info
+            
+            # Sample a single pixel: min()/max() would scan the whole frame on the hot path
+            if DEBUG and (self._frame_count == 1 or self._frame_count % 100 == 0):
+                print(f"[DEBUG] Step 2: Full frame shape: {full_frame.shape}, dtype: {full_frame.dtype}")
+                print(f"[DEBUG] Step 2: First pixel: {full_frame[0, 0]}, Size: {full_frame.size}")
+            
+
+            # Calculate A4 portrait crop area (center crop)
+            # crop_w = 1833  # Crop 60% of width
+            # crop_h = 2592  # Crop 80% of height
+            # start_x = 1388
+            # start_y = 0
+            
+            # # Crop the center area
+            # cropped_frame = full_frame[start_y:start_y+crop_h, start_x:start_x+crop_w]
+            
+            # # Resize to display size (1080x1920 for portrait)
+            # display_frame = cv2.resize(cropped_frame, (1833, 2592))
+            
+            # # Rotate 90 degrees for portrait display
+            # rotated_frame = cv2.rotate(display_frame, cv2.ROTATE_90_CLOCKWISE)
+            
+            # # Fix color channel swapping for preview only (RGB to BGR)
+            # rotated_frame = rotated_frame[:, :, ::-1]  # Reverse RGB to BGR for display
+            
+            # Step 3: Rotate frame first
+            # if self._frame_count == 1:
+            #     print(f"[DEBUG] Step 3: Rotating frame 90 degrees...")
+            # # rotated_frame = cv2.rotate(full_frame, cv2.ROTATE_90_COUNTERCLOCKWISE)
+            
+            # if self._frame_count == 1:
+            #     print(f"[DEBUG] Step 3: Rotated shape: {rotated_frame.shape}")
+
+            # # Step 4: Crop center area (100% width, 40% height) - no resize
+            # if self._frame_count == 1:
+            #     print(f"[DEBUG] Step 4: Cropping center area...")
+            # h, w = rotated_frame.shape[:2]
+            # crop_w = int(w)  # Crop 100% of width
+            # crop_h = int(h * 0.4)  # Crop 40% of height
+            # start_x = (w - crop_w) // 2
+            # start_y = (h - crop_h) // 2
+            
+            # cropped_frame = rotated_frame[start_y:start_y+crop_h, start_x:start_x+crop_w]
+            
+            
+            # if self._frame_count == 1:
+            #     print(f"[DEBUG] Step 4: Cropped shape: {cropped_frame.shape}")
+
+            # # Step 5: No resize - use cropped frame directly
+            # if self._frame_count == 1:
+            #     print(f"[DEBUG] Step 5: No resize - using cropped frame directly")
+            preview_frame = full_frame
+            
+            if DEBUG and self._frame_count == 1:
+                print(f"[DEBUG] Step 5: Preview shape: {preview_frame.shape}, dtype: {preview_frame.dtype}")
+            return preview_frame
         except Exception as e:
-            # Show any preview errors for debugging
-            print(f"[DEBUG] Preview error: {e}")
-            import traceback
-            traceback.print_exc()
-            pass
+            # Show the error that occurred
+            print(f"[DEBUG] Picamera2 error: {e}")
+            # If capture fails, try to restart the camera
+            if "Failed to queue buffer" in str(e) or "Input/output error" in str(e):
+                try:
+                    print("Camera buffer error detected, attempting restart...")
+                    self.picam.stop()
+                    time.sleep(0.1)  # Brief pause
+                    self.picam.start()
+                except Exception as restart_e:
+                    print(f"Camera restart failed: {restart_e}")
+                    # Switch to OpenCV fallback if available
+                    if not self.use_opencv and _import_cv2():
+                        print("Switching to OpenCV fallback...")
+                        self.use_opencv = True
+                        self.cap = cv2.VideoCapture(0)
+                        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+                        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+        return None
 
     def _setup_gpio(self):
         if not HAS_GPIO:
-            print("[DEBUG] GPIO not available, skipping GPIO setup")
+            if DEBUG:
+                print("[DEBUG] GPIO not available, skipping GPIO setup")
             return
         try:
-            print("[DEBUG] Setting up GPIO buttons...")
+            if DEBUG:
+                print("[DEBUG] Setting up GPIO buttons...")
             
             # # Close existing buttons if they exist
             # if hasattr(self, 'btn_next') and self.btn_next:
@@ -595,13 +873,14 @@ class PhotoboothApp(App):
             self.btn_enter = GpioButton(GPIO_ENTER, hold_time=3.0, pull_up=True, bounce_time=0.05)
 
             # Bind events with debug output - use Clock.schedule_once to avoid thread issues
-            self.btn_next.when_pressed = lambda: Clock.schedule_once(lambda dt: (print("[DEBUG] GPIO Next pressed"), self._on_input("next")), 0)
-            self.btn_prev.when_pressed = lambda: Clock.schedule_once(lambda dt: (print("[DEBUG] GPIO Prev pressed"), self._on_input("prev")), 0)
-            self.btn_shutter.when_pressed = lambda: Clock.schedule_once(lambda dt: (print("[DEBUG] GPIO Shutter pressed"), self._on_input("shutter")), 0)
-            self.btn_enter.when_pressed = lambda: Clock.schedule_once(lambda dt: (print("[DEBUG] GPIO Enter pressed"), self._on_input("enter")), 0)
-            self.btn_enter.when_held = lambda: Clock.schedule_once(lambda dt: (print("[DEBUG] GPIO Enter held (cancel)"), self._on_input("cancel")), 0)
+            self.btn_next.when_pressed = lambda: Clock.schedule_once(lambda dt: self._on_input("next"), 0)
+            self.btn_prev.when_pressed = lambda: Clock.schedule_once(lambda dt: self._on_input("prev"), 0)
+            self.btn_shutter.when_pressed = lambda: Clock.schedule_once(lambda dt: self._on_input("shutter"), 0)
+            self.btn_enter.when_pressed = lambda: Clock.schedule_once(lambda dt: self._on_input("enter"), 0)
+            self.btn_enter.when_held = lambda: Clock.schedule_once(lambda dt: self._on_input("cancel"), 0)
             
-            print(f"[DEBUG] GPIO buttons configured: Next={GPIO_NEXT}, Prev={GPIO_PREV}, Shutter={GPIO_SHUTTER}, Enter={GPIO_ENTER}")
+            if DEBUG:
+                print(f"[DEBUG] GPIO buttons configured: Next={GPIO_NEXT}, Prev={GPIO_PREV}, Shutter={GPIO_SHUTTER}, Enter={GPIO_ENTER}")
         except Exception as e:
             print(f"[DEBUG] GPIO setup failed: {e}")
             pass
@@ -647,8 +926,9 @@ class PhotoboothApp(App):
         Window.bind(on_key_down=on_key)
 
     def _on_input(self, action: str):
-        self.last_input_ts = time.time()
-        print(f"[DEBUG] Button pressed: {action}")  # Add debug output
+        self.last_input_ts = time.monotonic()
+        if DEBUG:
+            print(f"[DEBUG] Button pressed: {action}")
         
         # # Check if GPIO buttons are still working
         # if HAS_GPIO and hasattr(self, 'btn_next'):
@@ -669,31 +949,37 @@ class PhotoboothApp(App):
         #         self._setup_gpio()
         
         if action == "cancel":
-            print("[DEBUG] Cancelling session...")
+            if DEBUG:
+                print("[DEBUG] Cancelling session...")
             self._cancel_session()
             return
 
         if self.state == ScreenState.ATTRACT:
             if action in ("shutter", "enter"):
-                print("[DEBUG] Starting new session...")
+                if DEBUG:
+                    print("[DEBUG] Starting new session...")
                 self._start_session()
             return
 
         if self.state == ScreenState.TEMPLATE:
             if action == "next":
-                print("[DEBUG] Next template")
+                if DEBUG:
+                    print("[DEBUG] Next template")
                 self._cycle_template(+1)
             elif action == "prev":
-                print("[DEBUG] Previous template")
+                if DEBUG:
+                    print("[DEBUG] Previous template")
                 self._cycle_template(-1)
             elif action in ("shutter", "enter"):
-                print("[DEBUG] Starting countdown...")
+                if DEBUG:
+                    print("[DEBUG] Starting countdown...")
                 self._begin_countdown()
             return
 
         if self.state == ScreenState.COUNTDOWN:
             if action == "shutter":
-                print("[DEBUG] Instant capture!")
+                if DEBUG:
+                    print("[DEBUG] Instant capture!")
                 # cancel countdown timer and capture instantly
                 try:
                     Clock.unschedule(self.count_ev)
@@ -702,7 +988,8 @@ class PhotoboothApp(App):
                 self.root_widget.hide_countdown()
                 self._capture_now()
             elif action in ("next", "prev"):
-                print(f"[DEBUG] Template change during countdown: {action}")
+                if DEBUG:
+                    print(f"[DEBUG] Template change during countdown: {action}")
                 # allow adjusting template during countdown; reset countdown
                 try:
                     Clock.unschedule(self.count_ev)
@@ -717,31 +1004,37 @@ class PhotoboothApp(App):
             return
 
         if self.state == ScreenState.QUICK_REVIEW:
-            print("[DEBUG] In quick review state - no action")
+            if DEBUG:
+                print("[DEBUG] In quick review state - no action")
             return
 
         if self.state == ScreenState.SELECTION:
             if action == "next":
-                print("[DEBUG] Selection cursor next")
+                if DEBUG:
+                    print("[DEBUG] Selection cursor next")
                 self.selection_cursor = min(len(self.captures) - 1, self.selection_cursor + 1)
                 self._update_selection_hint()
             elif action == "prev":
-                print("[DEBUG] Selection cursor previous")
+                if DEBUG:
+                    print("[DEBUG] Selection cursor previous")
                 self.selection_cursor = max(0, self.selection_cursor - 1)
                 self._update_selection_hint()
             elif action == "shutter":
                 if self.selection_cursor in self.selected_indices:
-                    print(f"[DEBUG] Deselecting photo {self.selection_cursor}")
+                    if DEBUG:
+                        print(f"[DEBUG] Deselecting photo {self.selection_cursor}")
                     self.selected_indices.remove(self.selection_cursor)
                 else:
-                    if len(self.selected_indices) < self.current_template["slots"]:
-                        print(f"[DEBUG] Selecting photo {self.selection_cursor}")
+                    if len(self.selected_indices) < self._slots:
+                        if DEBUG:
+                            print(f"[DEBUG] Selecting photo {self.selection_cursor}")
                         self.selected_indices.append(self.selection_cursor)
                 self._update_selection_hint()
             elif action == "enter":
-                print(f"[DEBUG] Proceeding with {len(self.selected_indices)} selected photos")
+                if DEBUG:
+                    print(f"[DEBUG] Proceeding with {len(self.selected_indices)} selected photos")
                 # proceed when enough selected; otherwise ignore
-                if len(self.selected_indices) >= self.current_template["slots"]:
+                if len(self.selected_indices) >= self._slots:
                     self._compose_and_show()
                     self.state = ScreenState.REVIEW
                     # # Re-setup GPIO when entering review
@@ -753,13 +1046,16 @@ class PhotoboothApp(App):
 
         if self.state == ScreenState.REVIEW:
             if action == "next":
-                print("[DEBUG] Next filter")
+                if DEBUG:
+                    print("[DEBUG] Next filter")
                 self._cycle_filter(+1)
             elif action == "prev":
-                print("[DEBUG] Previous filter")
+                if DEBUG:
+                    print("[DEBUG] Previous filter")
                 self._cycle_filter(-1)
             elif action in ("shutter", "enter"):
-                print("[DEBUG] Printing photo...")
+                if DEBUG:
+                    print("[DEBUG] Printing photo...")
                 self._print()
             return
 
@@ -775,18 +1071,26 @@ class PhotoboothApp(App):
     #         print(f"[DEBUG] GPIO status check failed: {e}")
 
     def _check_inactivity(self, *_):
-        if self.state != ScreenState.ATTRACT and (time.time() - self.last_input_ts) > INACTIVITY_SECONDS:
-            print(f"[DEBUG] Inactivity timeout ({INACTIVITY_SECONDS}s), cancelling session")
+        if self.state != ScreenState.ATTRACT and (time.monotonic() - self.last_input_ts) > INACTIVITY_SECONDS:
+            if DEBUG:
+                print(f"[DEBUG] Inactivity timeout ({INACTIVITY_SECONDS}s), cancelling session")
             self._cancel_session()
 
     def _start_session(self):
-        print("[DEBUG] Starting new photobooth session")
+        if DEBUG:
+            print("[DEBUG] Starting new photobooth session")
+        # Create the day folder once per session instead of on every shot
+        self._session_dir = PHOTO_DIR / time.strftime("%Y/%m/%d")
+        self._session_dir.mkdir(parents=True, exist_ok=True)
         self.captures.clear()
+        self.capture_thumbs.clear()
         self.selected_indices.clear()
+        self._compose_cache.clear()
         self.taken_count = 0
-        self.to_take = self.current_template["slots"] + 2
+        self.to_take = self._slots + 2
         self.state = ScreenState.TEMPLATE
-        print(f"[DEBUG] State changed to: {self.state}")
+        if DEBUG:
+            print(f"[DEBUG] State changed to: {self.state}")
         # # Re-setup GPIO when starting session
         # if HAS_GPIO:
         #     print("[DEBUG] Re-setting up GPIO for new session...")
@@ -800,14 +1104,16 @@ class PhotoboothApp(App):
         old_index = self.template_index
         self.template_index = (self.template_index + delta) % len(self.templates)
         self.current_template = self.templates[self.template_index]
+        self._slots = self.current_template["slots"]
         
         # Update display size based on new template
         self.current_display_w, self.current_display_h = self._get_template_display_size(self.current_template)
         
-        print(f"[DEBUG] Template changed from {old_index} to {self.template_index}: {self.current_template['name']}")
-        print(f"[DEBUG] Display size updated to: {self.current_display_w}x{self.current_display_h}")
+        if DEBUG:
+            print(f"[DEBUG] Template changed from {old_index} to {self.template_index}: {self.current_template['name']}")
+            print(f"[DEBUG] Display size updated to: {self.current_display_w}x{self.current_display_h}")
         # Update toTake following N+2 rule (1->3, 2->4, 3->5)
-        self.to_take = self.current_template["slots"] + 2
+        self.to_take = self._slots + 2
         self.taken_count = 0
         self._update_hud(to_take=self.to_take)
         # refresh overlays per state
@@ -820,15 +1126,18 @@ class PhotoboothApp(App):
         old_filter = self.filter_name
         self.filter_index = (self.filter_index + delta) % len(FILTERS)
         self.filter_name = FILTERS[self.filter_index]
-        print(f"[DEBUG] Filter changed from {old_filter} to {self.filter_name}")
+        if DEBUG:
+            print(f"[DEBUG] Filter changed from {old_filter} to {self.filter_name}")
         self._update_hud()
-        if self.state == ScreenState.REVIEW and self.last_composed_path:
+        if self.state == ScreenState.REVIEW and self._compose_future:
             self._compose_and_show()
 
     def _begin_countdown(self):
-        print("[DEBUG] Starting countdown...")
+        if DEBUG:
+            print("[DEBUG] Starting countdown...")
         self.state = ScreenState.COUNTDOWN
-        print(f"[DEBUG] State changed to: {self.state}")
+        if DEBUG:
+            print(f"[DEBUG] State changed to: {self.state}")
         # # Re-setup GPIO when starting countdown
         # if HAS_GPIO:
         #     print("[DEBUG] Re-setting up GPIO for countdown...")
@@ -838,272 +1147,384 @@ class PhotoboothApp(App):
         self.root_widget.show_countdown(self.count_val)
         self.root_widget.set_overlay("", "", "")
         self.root_widget.hide_selection()
+        # Never leave a previous countdown's interval running alongside the new one
+        if self.count_ev is not None:
+            Clock.unschedule(self.count_ev)
         self.count_ev = Clock.schedule_interval(self._countdown_tick, 1.0)
 
     def _countdown_tick(self, dt):
         self.count_val -= 1
-        print(f"[DEBUG] Countdown: {self.count_val}")
+        if DEBUG:
+            print(f"[DEBUG] Countdown: {self.count_val}")
         if self.count_val <= 0:
             Clock.unschedule(self.count_ev)
+            self.count_ev = None
             self.root_widget.hide_countdown()
             self._capture_now()
         else:
             self.root_widget.show_countdown(self.count_val)
 
     def _capture_now(self):
-        print(f"[DEBUG] Capturing photo {len(self.captures) + 1}...")
+        if DEBUG:
+            print(f"[DEBUG] Capturing photo {len(self.captures) + 1}...")
         self.state = ScreenState.CAPTURING
         self._update_hud()
 
-        ts = time.strftime("%Y/%m/%d/%H%M%S")
-        out_path = PHOTO_DIR / f"{ts}_{len(self.captures)+1}.jpg"
-        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path = self._session_dir / f"{time.strftime('%H%M%S')}_{len(self.captures)+1}.jpg"
 
+        # Keep the captured pixels for the quick-review flash instead of decoding the JPEG again
+        quick_arr, quick_fmt = None, "rgb"
         if self.use_opencv:
             # ... (ส่วน OpenCV เหมือนเดิม) ...
-            ret, frame = self.cap.read()
+            with self._cam_lock:  # the preview thread may be mid-read
+                # grab() drains the (BUFFERSIZE=1) queue without decoding; only the shutter frame is decoded
+                for _ in range(2):
+                    self.cap.grab()
+                ret, frame = self.cap.retrieve()
             if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                frame = cv2.flip(frame, 1)
-                img = Image.fromarray(frame)
-                img.save(out_path, "JPEG", quality=95)
+                # Stay in BGR: the texture swizzles on the GPU and the encoders read BGR directly
+                # retrieve() hands back a fresh array, so mirror it in place rather than copying
+                quick_arr = cv2.flip(frame, 1, dst=frame)
+                quick_fmt = "bgr"
         else:
-                img = Image.new("RGB", (A4_W, A4_H), (128, 128, 128))
-                img.save(out_path, "JPEG", quality=95)
-                # Step 1: Capture image at CAMERA_STILL_W x CAMERA_STILL_H size
-                print(f"[DEBUG CAPTURE] Step 1: Capturing image at {CAMERA_STILL_W}x{CAMERA_STILL_H}...")
-                # Capture using still config (this will temporarily switch to still mode)
-                arr = self.picam.switch_mode_and_capture_array(self.still_config)
-                print(f"[DEBUG CAPTURE] Step 1: Captured shape: {arr.shape}, dtype: {arr.dtype}")
-                print(f"[DEBUG CAPTURE] Step 1: Min: {arr.min()}, Max: {arr.max()}")
-                
-                # Step 2: Rotate image 90 degrees counterclockwise
-                # print(f"[DEBUG CAPTURE] Step 2: Rotating 90 degrees...")
-                # rotated_arr = cv2.rotate(arr, cv2.ROTATE_90_COUNTERCLOCKWISE)
-                # print(f"[DEBUG CAPTURE] Step 2: Rotated shape: {rotated_arr.shape}")
-
-                # # Step 3: Crop center area (100% width, 40% height) - no resize
-                # print(f"[DEBUG CAPTURE] Step 3: Cropping center area...")
-                # h, w = rotated_arr.shape[:2]
-                # crop_w = int(w)  # Crop 100% of width
-                # crop_h = int(h * 0.4)  # Crop 40% of height
-                # start_x = (w - crop_w) // 2
-                # start_y = (h - crop_h) // 2
-                
-                # cropped_arr = rotated_arr[start_y:start_y+crop_h, start_x:start_x+crop_w]
-                # print(f"[DEBUG CAPTURE] Step 3: Cropped shape: {cropped_arr.shape}")
-
-                # Step 3: Use full image (no cropping, no resizing)
-                print(f"[DEBUG CAPTURE] Step 3: Using full captured image...")
-                captured_arr = arr
-                print(f"[DEBUG CAPTURE] Step 3: Final shape: {captured_arr.shape}")
-                
-                # Step 4: Fix color channel swapping for capture (RGB to BGR)
-                print(f"[DEBUG CAPTURE] Step 4: Converting RGB to BGR for capture...")
-                captured_arr = captured_arr[:, :, ::-1]  # Reverse RGB to BGR for capture
-                
-                # Step 5: Save image with lower quality to reduce file size
-                print(f"[DEBUG CAPTURE] Step 5: Saving to {out_path}...")
-                img = Image.fromarray(captured_arr, mode="RGB")
-                img.save(out_path, "JPEG", quality=75)  # Reduced quality for smaller file size
-                print(f"[DEBUG CAPTURE] Step 5: Saved successfully!")
-                
-                # Step 6: Switch back to video config for continued preview
-                self.picam.switch_mode(self.video_config)
-                print(f"[DEBUG CAPTURE] Step 6: Switched back to video config")
+                # Capture from the main stream of the running configuration (no mode switch)
+                if DEBUG:
+                    print(f"[DEBUG CAPTURE] Capturing {CAMERA_VIDEO_W}x{CAMERA_VIDEO_H} still to {out_path}...")
+                with self._cam_lock:
+                    req = self.picam.capture_request()
+                try:
+                    quick_arr = req.make_array("main")
+                finally:
+                    req.release()  # hand the buffer back to the camera before encoding
+                quick_fmt = "bgr"  # RGB888 is BGR-ordered in memory
+
+        if quick_arr is not None:
+            # Encode on the worker so the UI keeps drawing; the pool is FIFO with one worker,
+            # so a later _compose always finds the file written
+            self._pool.submit(self._save_capture, quick_arr, quick_fmt.upper(), out_path)
 
         self.captures.append(out_path)
-        if not hasattr(self, 'taken_count'):
-            self.taken_count = 0
         self.taken_count += 1
-        print(f"[DEBUG] Photo saved: {out_path}")
-        print(f"[DEBUG] Progress: {self.taken_count}/{self.current_template.get('slots', 4)} photos taken")
+        if DEBUG:
+            print(f"[DEBUG] Photo saved: {out_path}")
+            print(f"[DEBUG] Progress: {self.taken_count}/{self._slots} photos taken")
 
+        thumb_tex = None
         try:
-            img = Image.open(out_path).convert("RGB")
-            kv_tex = Texture.create(size=img.size, colorfmt="rgb")
-            kv_tex.blit_buffer(img.tobytes(), colorfmt="rgb", bufferfmt="ubyte")
-            kv_tex.flip_vertical()
-            self.root_widget.show_quick_texture(kv_tex, seconds=1.2)
+            if quick_arr is not None:
+                self.root_widget.show_quick_texture(_texture_from_array(quick_arr, quick_fmt), seconds=1.2)
+                # Selection thumbnail is made once here instead of re-decoding every JPEG per cursor move
+                thumb = Image.fromarray(np.ascontiguousarray(quick_arr), "RGB")  # channel order kept via quick_fmt
+                thumb.thumbnail((480, 320), Image.BILINEAR)
+                thumb_tex = _texture_from_array(np.asarray(thumb), quick_fmt)
         except Exception:
             pass
+        self.capture_thumbs.append(thumb_tex)
 
-        if self.taken_count >= self.current_template["slots"] + 2:
-            print("[DEBUG] All photos taken, moving to selection phase...")
+        if self.taken_count >= self._slots + 2:
+            if DEBUG:
+                print("[DEBUG] All photos taken, moving to selection phase...")
             # Short pause before entering selection (to mimic quick review pause)
             def go_selection(*_):
                 self.state = ScreenState.SELECTION
-                print(f"[DEBUG] State changed to: {self.state}")
+                if DEBUG:
+                    print(f"[DEBUG] State changed to: {self.state}")
                 # # Re-setup GPIO when entering selection
                 # if HAS_GPIO:
                 #     print("[DEBUG] Re-setting up GPIO for selection...")
                 #     self._setup_gpio()
                 self.selection_cursor = 0
                 self.selected_indices = []
+                # Thumbnail textures were built at capture time
+                thumbs: List[Texture] = [t for t in self.capture_thumbs if t is not None]
+                self.root_widget.show_selection(thumbs, self.selection_cursor, self.selected_indices)
                 self._update_selection_hint()
                 self._show_selection_ui()
                 self._update_hud()
             Clock.schedule_once(go_selection, 0.6)
         else:
-            print("[DEBUG] More photos needed, starting next countdown...")
+            if DEBUG:
+                print("[DEBUG] More photos needed, starting next countdown...")
             self._begin_countdown()
 
+    @staticmethod
+    def _save_capture(arr: np.ndarray, rawmode: str, out_path: Path):
+        try:
+            # Wrap the contiguous frame for the encoder rather than copying it into a new image
+            arr = np.ascontiguousarray(arr)
+            if HAS_TURBOJPEG:
+                # libjpeg-turbo's NEON encoder reads BGR/RGB natively, no PIL image in between
+                fmt = TJPF_BGR if rawmode == "BGR" else TJPF_RGB
+                out_path.write_bytes(_tj.encode(arr, quality=CAPTURE_JPEG_QUALITY, pixel_format=fmt,
+                                                jpeg_subsample=TJSAMP_420))
+                return
+            img = Image.frombuffer("RGB", (arr.shape[1], arr.shape[0]), arr, "raw", rawmode, 0, 1)
+            img.save(out_path, "JPEG", quality=CAPTURE_JPEG_QUALITY, optimize=False, progressive=False, subsampling=2)
+        except Exception as e:
+            print(f"[DEBUG] Saving {out_path} failed: {e}")
+
     def _update_selection_hint(self):
-        n = self.current_template["slots"]
+        n = self._slots
         cursor = self.selection_cursor + 1
         selected = len(self.selected_indices)
         self.root_widget.hud.text = f"Selection: choose {n} • cursor {cursor}/{len(self.captures)} • selected {selected}/{n}"
-        # Build thumbnail textures for selection UI
-        thumbs: List[Texture] = []
-        for p in self.captures:
-            try:
-                img = Image.open(p).convert("RGB")
-                # make thumb
-                tw, th = 480, 320
-                scale = min(tw / img.width, th / img.height)
-                nw, nh = int(img.width * scale), int(img.height * scale)
-                thumb = img.resize((nw, nh), Image.LANCZOS)
-                tex = Texture.create(size=thumb.size, colorfmt='rgb')
-                tex.blit_buffer(thumb.tobytes(), colorfmt='rgb', bufferfmt='ubyte')
-                tex.flip_vertical()
-                thumbs.append(tex)
-            except Exception:
-                continue
-        self.root_widget.show_selection(thumbs, self.selection_cursor, self.selected_indices)
+        # Textures were bound on entering SELECTION; a cursor move only restyles the thumbnails
+        self.root_widget.update_selection_highlight(self.selection_cursor, self.selected_indices)
 
     def _compose_and_show(self):
-        print(f"[DEBUG] Composing image with {len(self.selected_indices)} photos")
+        if DEBUG:
+            print(f"[DEBUG] Composing image with {len(self.selected_indices)} photos")
         paths = [self.captures[i] for i in self.selected_indices]
-        composed = self._compose(paths, self.filter_name, self.current_template)
+        self.root_widget.set_overlay(title="Composing…", subtitle="", footer="", visible=True)
+        # hide selection UI explicitly when entering review
+        self.root_widget.hide_selection()
+        fut = self._pool.submit(self._compose, paths, self.filter_name, self.current_template)
+        self._compose_future = fut
+        fut.add_done_callback(lambda f: Clock.schedule_once(lambda *_: self._on_composed(f)))
+
+    def _on_composed(self, fut):
+        # A newer compose (filter change) or a cancelled session makes this result stale
+        if fut is not self._compose_future or self.state != ScreenState.REVIEW:
+            return
+        try:
+            composed, canvas = fut.result()
+        except Exception as e:
+            print(f"[DEBUG] Compose failed: {e}")
+            self.root_widget.set_overlay(title="Compose failed", subtitle=str(e)[:120], footer="", visible=True)
+            return
         self.last_composed_path = composed
-        print(f"[DEBUG] Composed image saved: {composed}")
+        if DEBUG:
+            print(f"[DEBUG] Composed image saved: {composed}")
         try:
-            img = Image.open(composed).convert("RGB")
-            kv_tex = Texture.create(size=img.size, colorfmt="rgb")
-            kv_tex.blit_buffer(img.tobytes(), colorfmt="rgb", bufferfmt="ubyte")
-            kv_tex.flip_vertical()
+            kv_tex = _texture_from_array(canvas)
             # Keep composed visible during review (no auto-hide)
             self.root_widget.show_quick_texture(kv_tex, seconds=None)
             self._show_review()
-            # hide selection UI explicitly when entering review
-            self.root_widget.hide_selection()
         except Exception:
             pass
 
-    def _compose(self, selected_paths: List[Path], filt: str, tpl: dict) -> Path:
+    def _compose(self, selected_paths: List[Path], filt: str, tpl: dict) -> Tuple[Path, np.ndarray]:
+        # Filter cycling in REVIEW reuses the unfiltered canvas instead of re-decoding/resizing every slot
+        key = (tpl.get("id"), tuple(selected_paths))
+        base = self._compose_cache.get(key)
+        if base is None:
+            base = self._compose_base(selected_paths, tpl)
+            # The base *is* self._canvas_arr, so composing a new one overwrites the cached one
+            self._compose_cache.clear()
+            self._compose_cache[key] = base
+        canvas = self._apply_filter(base, filt)
+
+        ts = time.strftime("%Y/%m/%d/%H%M%S")
+        out_path = PHOTO_DIR / f"A4_{ts}.jpg"
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        if HAS_TURBOJPEG:
+            out_path.write_bytes(_tj.encode(canvas, quality=95, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420))
+        else:
+            # PIL keeps RGB as 4 bytes/pixel, so wrapping copies; only done here, for the encoder
+            img = Image.frombuffer("RGB", (canvas.shape[1], canvas.shape[0]), canvas, "raw", "RGB", 0, 1)
+            img.save(out_path, format="JPEG", quality=95, optimize=False, progressive=False, subsampling=2)
+        # Hand the in-memory canvas back so the review texture needs no A4 JPEG decode
+        return out_path, canvas
+
+    def _compose_base(self, selected_paths: List[Path], tpl: dict) -> np.ndarray:
         W, H = A4_W, A4_H
+        # Compose into the persistent A4 buffer instead of allocating ~26 MB per call. It stays an
+        # ndarray end to end: Image.fromarray would copy an RGB array rather than wrap it.
+        canvas = self._canvas_arr
         
         # Load background template if available
         background_path = tpl.get("background")
         if background_path and Path(background_path).exists():
             try:
-                canvas = Image.open(background_path).convert("RGB")
+                bg = Image.open(background_path).convert("RGB")
                 # Ensure it's the right size
-                if canvas.size != (W, H):
-                    canvas = canvas.resize((W, H), Image.LANCZOS)
+                if bg.size != (W, H):
+                    bg = bg.resize((W, H), Image.LANCZOS)
+                canvas[:] = np.asarray(bg)
             except Exception as e:
                 print(f"[DEBUG] Failed to load background {background_path}: {e}")
-                canvas = Image.new("RGB", (W, H), (34, 34, 34))
+                canvas.fill(34)
         else:
             # Default solid color background
-            canvas = Image.new("RGB", (W, H), (34, 34, 34))
-
-        def to_rect(r: dict) -> Tuple[int, int, int, int]:
-            x = int((r["leftPct"] / 100) * W)
-            y = int((r["topPct"] / 100) * H)
-            w = int((r["widthPct"] / 100) * W)
-            h = int((r["heightPct"] / 100) * H)
-            return x, y, w, h
+            canvas.fill(34)
 
-        rects = [to_rect(r) for r in tpl.get("rects", [])]
+        rects = tpl["_rects_px"]
         for i, p in enumerate(selected_paths):
             if i >= len(rects):
                 break
+            x, y, w, h = rects[i]
             try:
-                img = Image.open(p).convert("RGB")
+                img = Image.open(p)
+                # libjpeg DCT scaling (1/2, 1/4, 1/8) decodes straight to >= 2x the slot size
+                img.draft("RGB", (w * 2, h * 2))
+                img.load()
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
             except Exception:
                 continue
-            x, y, w, h = rects[i]
             scale = max(w / img.width, h / img.height)
             nw, nh = int(img.width * scale), int(img.height * scale)
-            resized = img.resize((nw, nh), Image.LANCZOS)
             dx = x + (w - nw) // 2
             dy = y + (h - nh) // 2
-            canvas.paste(resized, (dx, dy))
-
-        if filt == "black_white":
-            canvas = ImageOps.grayscale(canvas).convert("RGB")
-        elif filt == "sepia":
-            g = ImageOps.colorize(ImageOps.grayscale(canvas), black="#2e1f0f", white="#f4e1c1")
-            canvas = g.convert("RGB")
-
-        ts = time.strftime("%Y/%m/%d/%H%M%S")
-        out_path = PHOTO_DIR / f"A4_{ts}.jpg"
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-        canvas.save(out_path, format="JPEG", quality=95)
-        return out_path
+            x0, y0 = max(dx, 0), max(dy, 0)
+            x1, y1 = min(dx + nw, W), min(dy + nh, H)
+            if _import_cv2():
+                # cv2.resize (INTER_AREA for downscale) is far cheaper than PIL's convolution resize
+                interp = cv2.INTER_LANCZOS4 if nw > img.width else cv2.INTER_AREA
+                src = np.asarray(img)
+                if (x0, y0, x1, y1) == (dx, dy, dx + nw, dy + nh):
+                    # Slot lies fully on the canvas: resize straight into it
+                    cv2.resize(src, (nw, nh), dst=canvas[dy:dy + nh, dx:dx + nw], interpolation=interp)
+                    continue
+                resized = cv2.resize(src, (nw, nh), interpolation=interp)
+            else:
+                # Integer box-reduce does the bulk of the downscale cheaply; bilinear finishes the remainder
+                factor = max(1, int(min(img.width / nw, img.height / nh)))
+                if factor > 1:
+                    img = img.reduce(factor)
+                if nw > img.width:
+                    resized = np.asarray(img.resize((nw, nh), Image.LANCZOS))
+                else:
+                    resized = np.asarray(img.resize((nw, nh), Image.BILINEAR))
+            # Same clipping as Image.paste: only the part that lands on the canvas is copied
+            if x1 > x0 and y1 > y0:
+                canvas[y0:y1, x0:x1] = resized[y0 - dy:y1 - dy, x0 - dx:x1 - dx]
+        return canvas
+
+    @staticmethod
+    def _apply_filter(arr: np.ndarray, filt: str) -> np.ndarray:
+        # Filters are one luma pass plus a FILTER_LUTS lookup instead of PIL grayscale/colorize passes.
+        # The base canvas is never modified: filtered output goes to a new array.
+        lut = FILTER_LUTS.get(filt)
+        if lut is None:
+            return arr
+        if _import_cv2():
+            # OpenCV's SIMD cvtColor/LUT kernels are the fastest path when available
+            out = cv2.cvtColor(cv2.cvtColor(arr, cv2.COLOR_RGB2GRAY), cv2.COLOR_GRAY2RGB)
+            if lut is not GRAY_LUT:  # the gray table is the identity, nothing to remap
+                cv2.LUT(out, lut.reshape(256, 1, 3), dst=out)
+            return out
+        if HAS_NUMBA:
+            out = np.empty_like(arr)
+            _luma_lut_into(arr, out, lut)
+            return out
+        # Rec.601 in 8.8 fixed point (77 + 150 + 29 = 256); uint16 so the products cannot wrap
+        c = arr.astype(np.uint16)
+        y = ((c[..., 0] * 77 + c[..., 1] * 150 + c[..., 2] * 29) >> 8).astype(np.uint8)
+        return np.take(lut, y, axis=0)
 
     def _print(self):
         if not self.last_composed_path:
-            print("[DEBUG] No composed image to print")
+            if DEBUG:
+                print("[DEBUG] No composed image to print")
             return
-        print(f"[DEBUG] Printing image: {self.last_composed_path}")
+        if self._compose_future and not self._compose_future.done():
+            if DEBUG:
+                print("[DEBUG] Still composing, print ignored")
+            return
+        if self._print_proc and self._print_proc.poll() is None:
+            if DEBUG:
+                print("[DEBUG] Print already in progress")
+            return
+        if DEBUG:
+            print(f"[DEBUG] Printing image: {self.last_composed_path}")
         # Show printing overlay
+        self.state = ScreenState.PRINTING
+        self._update_hud()
         self.root_widget.set_overlay(title="Printing...", subtitle="Sending job to printer", footer="", visible=True)
         self.root_widget.hide_selection()
         args = ["lp", "-d", "Brother_DCP_T430W_USB", "-o", "media=Plain", "-o", "print-quality=4.5", str(self.last_composed_path)]
-        print(f"[DEBUG] Print command: {' '.join(args)}")
-        proc = subprocess.run(args, capture_output=True)
+        if DEBUG:
+            print(f"[DEBUG] Print command: {' '.join(args)}")
+        # lp can take seconds while CUPS filters the job; poll it from the Clock instead of blocking the UI
+        try:
+            self._print_proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        except OSError as e:
+            print(f"[DEBUG] Print failed: {e}")
+            self.state = ScreenState.REVIEW
+            self._update_hud()
+            self.root_widget.set_overlay(title="Print failed", subtitle=str(e)[:120], footer="Press Space/Enter to retry", visible=True)
+            return
+        Clock.schedule_interval(self._poll_print, 0.2)
+
+    def _poll_print(self, *_):
+        proc = self._print_proc
+        if proc is None:
+            return False
+        if proc.poll() is None:
+            return
+        self._print_proc = None
+        if self.state != ScreenState.PRINTING:
+            return False  # session was cancelled while lp ran
         if proc.returncode != 0:
-            err = proc.stderr.decode('utf-8', 'ignore')
+            err = proc.stderr.read().decode('utf-8', 'ignore')
             print(f"[DEBUG] Print failed: {err}")
+            self.state = ScreenState.REVIEW
+            self._update_hud()
             self.root_widget.set_overlay(title="Print failed", subtitle=err[:120], footer="Press Space/Enter to retry", visible=True)
         else:
-            print("[DEBUG] Print job sent successfully")
+            if DEBUG:
+                print("[DEBUG] Print job sent successfully")
             self.root_widget.set_overlay(title="Printed", subtitle="Job sent successfully", footer="", visible=True)
+            Clock.schedule_once(lambda *_: self.state == ScreenState.PRINTING and self._cancel_session(), 3.0)
+        return False
 
     def _open_settings(self):
         SettingsModal(self.printer_name, on_save=self._save_printer).open()
 
     def _save_printer(self, name: str):
         self.printer_name = name or ""
+        path = PHOTO_DIR / "printer.json"
+        tmp = path.with_name(path.name + ".tmp")
         try:
-            (PHOTO_DIR / "printer.json").write_text(json.dumps({"printer": self.printer_name}))
+            # Write-then-rename so a reader never sees a half-written file
+            tmp.write_text(json.dumps({"printer": self.printer_name}))
+            os.replace(tmp, path)
+            self._printer_mtime = path.stat().st_mtime
         except Exception:
             pass
 
     def _load_printer_name(self):
+        path = PHOTO_DIR / "printer.json"
         try:
-            data = json.loads((PHOTO_DIR / "printer.json").read_text())
+            mtime = path.stat().st_mtime
+            if mtime == self._printer_mtime:
+                return  # unchanged since the last read/save
+            data = json_loads(path.read_bytes())
             self.printer_name = data.get("printer", "")
+            self._printer_mtime = mtime
         except Exception:
             self.printer_name = ""
 
     def _cancel_session(self):
-        print("[DEBUG] Cancelling photobooth session")
+        if DEBUG:
+            print("[DEBUG] Cancelling photobooth session")
         
         # Stop countdown timer if it's running
-        if hasattr(self, 'count_ev'):
-            try:
-                Clock.unschedule(self.count_ev)
+        if self.count_ev is not None:
+            Clock.unschedule(self.count_ev)
+            self.count_ev = None
+            if DEBUG:
                 print("[DEBUG] Countdown timer stopped")
-            except Exception:
-                pass
         
         # Hide countdown display
         self.root_widget.hide_countdown()
         
         self.state = ScreenState.ATTRACT
-        print(f"[DEBUG] State changed to: {self.state}")
+        if DEBUG:
+            print(f"[DEBUG] State changed to: {self.state}")
         # # Re-setup GPIO when cancelling session
         # if HAS_GPIO:
         #     print("[DEBUG] Re-setting up GPIO for attract mode...")
         #     self._setup_gpio()
         self.captures.clear()
+        self.capture_thumbs.clear()
         self.selected_indices.clear()
         self.taken_count = 0
         self.to_take = 0
         self.last_composed_path = None
+        self._compose_future = None
+        self._compose_cache.clear()
         self._update_hud()
         self._show_attract()
 
@@ -1127,7 +1548,7 @@ class PhotoboothApp(App):
         self.root_widget.hide_quick()
 
     def _show_template(self):
-        n = self.current_template["slots"]
+        n = self._slots
         self.root_widget.set_overlay(
             title="Select your template",
             subtitle=f"Use Prev/Next buttons to change. Photos to take: {n+2}",
@@ -1138,7 +1559,7 @@ class PhotoboothApp(App):
         self.root_widget.hide_quick()
 
     def _show_selection_ui(self):
-        need = self.current_template["slots"]
+        need = self._slots
         self.root_widget.set_overlay(
             title=f"Choose {need} photo(s)",
             subtitle="Prev/Next to move • Shutter to Select/Deselect",
@@ -1157,6 +1578,9 @@ class PhotoboothApp(App):
 
     def on_stop(self):
         """Clean up camera resources when app stops"""
+        self._pool.shutdown(wait=False)
+        self._stop_capture.set()
+        self._capture_thread.join(timeout=1.0)
         try:
             if hasattr(self, 'picam') and self.picam:
                 self.picam.stop()
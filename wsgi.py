@@ -0,0 +1,5 @@
+from app import _warm_backgrounds_once, app  # noqa: F401
+
+# Runs once per gunicorn worker and marks the warm-up done, so the before_request
+# hook doesn't repeat it; backgrounds that are already sized are skipped.
+_warm_backgrounds_once()